@@ -1,8 +1,10 @@
 from .common_types import *
 import json
+import threading
 import requests
 import retry
 from ._timeout import timeout
+from .store import ArtifactStore
 from logzero import logger
 DEFAULT_TIMEOUT = 15
 
@@ -26,8 +28,13 @@ class CommonClient:
     def __init__(
             self,
             base_url: str = 'http://localhost:8100',
-            desired_caps: dict = None):
+            desired_caps: dict = None,
+            store: ArtifactStore = None):
         self._base_url = base_url
+        self._store = store
+        self._request_count = 0
+        self._request_count_lock = threading.Lock()
+        self._session_lock = threading.Lock()
         self._session_id: str = self.session(desired_caps=desired_caps)
 
     def screenshot(self, file_path: str = None, raw=None) -> None or str:
@@ -40,12 +47,21 @@ class CommonClient:
         import base64
         value = self.base_request(GET, "/screenshot").get("value")
         imgdata = base64.b64decode(value)
+        self._store_artifact(imgdata, kind="screenshot")
         if raw:
             return value
         else:
             with open(f'{file_path}', 'wb') as f:
                 f.write(imgdata)
 
+    def _store_artifact(self, data: bytes or str, kind: str):
+        if self._store is None:
+            return
+        try:
+            self._store.put(data, kind=kind)
+        except OSError as e:
+            logger.warning(f"fail to store {kind} artifact: {e}")
+
     def session(self, desired_caps: dict = None) -> str:
         capabilities = {}
         if desired_caps is not None:
@@ -58,14 +74,22 @@ class CommonClient:
         return self._session_id
 
     def _get_session_id(self) -> str:
-        if self._session_id != '':
+        # only one thread may re-create the session, the others reuse it
+        with self._session_lock:
+            if self._session_id != '':
+                return self._session_id
+            dated_session_id = self.status()["sessionId"]
+            if dated_session_id:
+                self._session_id = dated_session_id
+            else:
+                self._session_id = self.session()
             return self._session_id
-        dated_session_id = self.status()["sessionId"]
-        if dated_session_id:
-            self._session_id = dated_session_id
-        else:
-            self._session_id = self.session()
-        return self._session_id
+
+    def _invalidate_session_id(self, session_id: str):
+        with self._session_lock:
+            # a session already re-created by another thread is kept
+            if self._session_id == session_id:
+                self._session_id = ''
 
     def _gen_element_obj_list(
         self,
@@ -102,8 +126,8 @@ class CommonClient:
         full_url = (f"/session/{session_id}" + wda_url).strip()
         session_response = self.base_request(method, full_url, body)
         if session_response == "invalid session id":
-            logger.debug(f"invalid session {self._session_id}")
-            self._session_id = ''
+            logger.debug(f"invalid session {session_id}")
+            self._invalidate_session_id(session_id)
             raise
         elif session_response == 'no such element':
             logger.debug(f"no such element")
@@ -117,6 +141,8 @@ class CommonClient:
             wda_url: str,
             body: dict = None):
         final_url = (self._base_url + wda_url).strip()
+        with self._request_count_lock:
+            self._request_count += 1
         response = requests.request(method=method, url=final_url, json=body)
         response_value = response.json()
         if response.status_code == 404:
@@ -270,6 +296,7 @@ class CommonClient:
         :return: the element tree
         """
         source = self.base_request(GET, "/source").get("value")
+        self._store_artifact(source, kind="source")
         return source
 
     def get_page_accessible_source(self) -> str:
@@ -287,6 +314,13 @@ class CommonClient:
         # todo some errors catch
         self.find_element_by_name("Hide keyboard").click()
 
+    def dismiss_keyboard(self):
+        """
+        Dismiss keyboard with a single request, no need of a hide keyboard button
+        :return: none
+        """
+        self.session_request(POST, "/wda/keyboard/dismiss")
+
     def quit(self):
         """
         Delete session id and back to home screen
@@ -460,6 +494,46 @@ class CommonClient:
         find_attr = 'find_elements_by_' + method
         return self.__getattribute__(find_attr)(value)
 
+    def fill_form(
+            self,
+            fields: dict,
+            clear: bool = True,
+            hide_keyboard: bool = True,
+            workers: int = 4) -> dict:
+        """
+        Fill several text fields with as few requests as possible
+        :param fields: mapping of (By, value) locators to the text to type
+        :param clear: clear every field before typing
+        :param hide_keyboard: dismiss the keyboard once after the last field
+        :param workers: number of concurrent element lookups
+        :return: requests actually sent (retries included, as well as requests of other
+            threads sharing this client) and nominal_saved, a fixed model of the requests
+            avoided compared to calling hide_keyboard after every field: one lookup and
+            one click per field without retries, less the single dismiss request
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        locators = list(fields)
+        with self._request_count_lock:
+            start_count = self._request_count
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(locators) or 1))) as pool:
+            elements = list(pool.map(lambda loc: self.find_element(*loc), locators))
+        for locator, element in zip(locators, elements):
+            if clear:
+                element.clear()
+            element.send_keys(fields[locator])
+        if hide_keyboard and locators:
+            self.dismiss_keyboard()
+        with self._request_count_lock:
+            requests_made = self._request_count - start_count
+        # lookups, clears and typing are the same field by field, only the keyboard differs
+        nominal_saved = 2 * len(locators) - 1 if hide_keyboard and locators else 0
+        report = {
+            "fields": len(locators),
+            "requests": requests_made,
+            "nominal_saved": nominal_saved}
+        logger.info(f"fill form {report}")
+        return report
+
     def get_element_id_list(self, using: str, value: str):
         logger.info(f"find ELEMENTS using {using} value {value}")
         while True:
@@ -557,6 +631,9 @@ class Element(object):
         return self.element_request(GET, '/enabled').get("value")
 
 
-def remote(base_url: str = None, desired_caps: dict = None) -> CommonClient:
-    client = CommonClient(base_url=base_url, desired_caps=desired_caps)
+def remote(
+        base_url: str = None,
+        desired_caps: dict = None,
+        store: ArtifactStore = None) -> CommonClient:
+    client = CommonClient(base_url=base_url, desired_caps=desired_caps, store=store)
     return client
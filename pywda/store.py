@@ -0,0 +1,214 @@
+import contextlib
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+from logzero import logger
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+_KIND_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class ArtifactStore:
+    """
+    On-disk content-addressed store for page sources and screenshots
+    """
+
+    def __init__(self, root: str, max_bytes: int = 256 * 1024 * 1024):
+        self._root = root
+        self._max_bytes = max_bytes
+        os.makedirs(os.path.join(self._root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(self._root, "latest"), exist_ok=True)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self._root, "objects", digest[:2], digest)
+
+    def _latest_path(self, kind: str) -> str:
+        if not _KIND_PATTERN.match(kind):
+            raise ValueError(f"Invalid artifact kind {kind!r}")
+        return os.path.join(self._root, "latest", kind)
+
+    @contextlib.contextmanager
+    def _lock(self):
+        """
+        Serialize writers of all processes sharing the store
+        """
+        fd = os.open(os.path.join(self._root, ".lock"), os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            yield
+        finally:
+            # closing the file releases the lock
+            os.close(fd)
+
+    def _write_atomic(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # mkstemp creates 0600 files, the store is shared with other users
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _touch(self, path: str) -> bool:
+        """
+        Mark artifact as recently used, best effort for files owned by other users
+        :return: false if artifact is missing
+        """
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        except OSError:
+            pass
+        return True
+
+    def _read_size(self) -> int or None:
+        try:
+            with open(os.path.join(self._root, "size"), 'r') as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_size(self, size: int):
+        self._write_atomic(os.path.join(self._root, "size"), str(size).encode("ascii"))
+
+    def put(self, data: bytes or str, kind: str = None) -> str or None:
+        """
+        Store data once by its sha256
+        :param data: artifact content, str is encoded as utf-8
+        :param kind: if given, record data as the latest artifact of this kind
+        :return: hex digest of the content or none if data is bigger than max_bytes
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        latest_path = self._latest_path(kind) if kind is not None else None
+        if len(data) > self._max_bytes:
+            logger.debug(f"skip artifact of {len(data)} bytes, bigger than {self._max_bytes}")
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        with self._lock():
+            added = not self._touch(path)
+            if added:
+                self._write_atomic(path, data)
+            if latest_path is not None:
+                self._write_atomic(latest_path, digest.encode("ascii"))
+            if added:
+                size = self._read_size()
+                if size is None or size + len(data) > self._max_bytes:
+                    self._evict(keep=digest)
+                else:
+                    self._write_size(size + len(data))
+        return digest
+
+    def latest(self, kind: str) -> str or None:
+        """
+        :param kind: artifact kind, e.g. "source" or "screenshot"
+        :return: digest of the latest artifact of this kind or none
+        """
+        try:
+            with open(self._latest_path(kind), 'r') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def open(self, digest: str) -> mmap.mmap or None:
+        """
+        Memory-map a stored artifact read-only, caller should close it
+        :param digest: hex digest returned by put
+        :return: mmap object or none if artifact is missing or empty (empty files can not be mapped, use read)
+        """
+        if digest is None:
+            return None
+        path = self._object_path(digest)
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        # the mapping stays valid even if the file is evicted meanwhile
+        self._touch(path)
+        return mapped
+
+    def read(self, digest: str) -> bytes or None:
+        """
+        :param digest: hex digest returned by put
+        :return: artifact content or none if artifact is missing
+        """
+        if digest is None:
+            return None
+        path = self._object_path(digest)
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    data = b''
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        data = mapped[:]
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        return data
+
+    def evict(self, keep: str = None):
+        """
+        Remove least recently used artifacts until store fits in max_bytes
+        :param keep: digest that must not be removed, latest artifacts are always kept
+        :return: none
+        """
+        with self._lock():
+            self._evict(keep=keep)
+
+    def _evict(self, keep: str = None):
+        protected = {keep} if keep is not None else set()
+        for kind in os.listdir(os.path.join(self._root, "latest")):
+            if _KIND_PATTERN.match(kind):
+                protected.add(self.latest(kind))
+        protected_paths = {self._object_path(digest) for digest in protected if digest}
+        entries = []
+        total = 0
+        objects_dir = os.path.join(self._root, "objects")
+        for sub in os.listdir(objects_dir):
+            sub_dir = os.path.join(objects_dir, sub)
+            if not os.path.isdir(sub_dir):
+                continue
+            for name in os.listdir(sub_dir):
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(sub_dir, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            if path in protected_paths:
+                continue
+            try:
+                os.remove(path)
+                logger.debug(f"evict artifact {path}")
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._write_size(total)
@@ -0,0 +1,86 @@
+from collections import Counter
+from unittest import mock
+
+import pytest
+
+from pywda import driver
+from pywda.common_types import By
+
+SESSION_URL = "http://wda/session/sid"
+
+
+def fake_response(method, url, json=None):
+    if url.endswith("/element"):
+        value = {"ELEMENT": json["value"]}
+    else:
+        value = None
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {"sessionId": "sid", "value": value}
+    return response
+
+
+@pytest.fixture
+def client():
+    with mock.patch.object(driver.requests, "request", side_effect=fake_response) as request:
+        c = driver.CommonClient(base_url="http://wda")
+        request.reset_mock()
+        yield c, request
+
+
+def sent(request):
+    return Counter((call.kwargs["method"], call.kwargs["url"]) for call in request.call_args_list)
+
+
+def test_fill_form(client):
+    c, request = client
+    report = c.fill_form({(By.NAME, "user"): "u", (By.NAME, "password"): "p"})
+    assert sent(request) == Counter({
+        ("POST", SESSION_URL + "/element"): 2,
+        ("POST", SESSION_URL + "/element/user/clear"): 1,
+        ("POST", SESSION_URL + "/element/password/clear"): 1,
+        ("POST", SESSION_URL + "/element/user/value"): 1,
+        ("POST", SESSION_URL + "/element/password/value"): 1,
+        ("POST", SESSION_URL + "/wda/keyboard/dismiss"): 1})
+    assert report == {"fields": 2, "requests": 7, "nominal_saved": 3}
+
+
+def test_fill_form_types_values(client):
+    c, request = client
+    c.fill_form({(By.NAME, "user"): "u"}, clear=False, hide_keyboard=False)
+    assert sent(request) == Counter({
+        ("POST", SESSION_URL + "/element"): 1,
+        ("POST", SESSION_URL + "/element/user/value"): 1})
+    assert request.call_args.kwargs["json"] == {"value": "u"}
+
+
+def test_fill_form_skip_clear_and_keyboard(client):
+    c, request = client
+    report = c.fill_form(
+        {(By.NAME, "a"): "1", (By.NAME, "b"): "2", (By.NAME, "c"): "3"},
+        clear=False,
+        hide_keyboard=False)
+    methods = sent(request)
+    assert not any(url.endswith("/clear") for _, url in methods)
+    assert ("POST", SESSION_URL + "/wda/keyboard/dismiss") not in methods
+    assert report == {"fields": 3, "requests": 6, "nominal_saved": 0}
+
+
+def test_fill_form_empty(client):
+    c, request = client
+    assert c.fill_form({}) == {"fields": 0, "requests": 0, "nominal_saved": 0}
+    request.assert_not_called()
+
+
+def test_dismiss_keyboard(client):
+    c, request = client
+    c.dismiss_keyboard()
+    assert sent(request) == Counter({("POST", SESSION_URL + "/wda/keyboard/dismiss"): 1})
+
+
+def test_invalidate_keeps_recreated_session(client):
+    c, _ = client
+    c._session_id = "new"
+    c._invalidate_session_id("sid")
+    assert c._session_id == "new"
+    c._invalidate_session_id("new")
+    assert c._session_id == ""
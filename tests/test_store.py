@@ -0,0 +1,154 @@
+import base64
+import os
+import stat
+from unittest import mock
+
+import pytest
+
+from pywda import driver
+from pywda.store import ArtifactStore
+
+PNG = b"\x89PNG\r\n\x1a\nfake"
+SOURCE = "<XCUIElementTypeApplication/>"
+
+
+def age(store: ArtifactStore, digest: str, mtime: float):
+    os.utime(store._object_path(digest), (mtime, mtime))
+
+
+def test_put_deduplicates(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    first = store.put(b"hello")
+    assert store.put("hello") == first
+    assert store.read(first) == b"hello"
+    assert len(os.listdir(os.path.dirname(store._object_path(first)))) == 1
+
+
+def test_files_are_readable_by_others(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    digest = store.put(b"hello", kind="source")
+    for path in (store._object_path(digest), os.path.join(str(tmp_path), "latest", "source")):
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+
+def test_latest(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    assert store.latest("source") is None
+    store.put(b"one", kind="source")
+    second = store.put(b"two", kind="source")
+    assert store.latest("source") == second
+    assert ArtifactStore(str(tmp_path)).latest("source") == second
+
+
+def test_invalid_kind(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.put(b"data", kind="../x")
+    with pytest.raises(ValueError):
+        store.latest("../x")
+
+
+def test_missing_digest(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    missing = "0" * 64
+    assert store.read(None) is None
+    assert store.open(None) is None
+    assert store.read(missing) is None
+    assert store.open(missing) is None
+
+
+def test_open_maps_content(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    digest = store.put(b"hello")
+    with store.open(digest) as mapped:
+        assert mapped[:] == b"hello"
+
+
+def test_empty_artifact(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    digest = store.put(b"")
+    assert store.read(digest) == b""
+    assert store.open(digest) is None
+
+
+def test_oversized_artifact_is_skipped(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=10)
+    assert store.put(b"x" * 20, kind="source") is None
+    assert store.latest("source") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=10)
+    old = store.put(b"aaaa")
+    new = store.put(b"bbbb")
+    age(store, old, 1)
+    age(store, new, 2)
+    last = store.put(b"cccc")
+    assert store.read(old) is None
+    assert store.read(new) == b"bbbb"
+    assert store.read(last) == b"cccc"
+
+
+def test_eviction_keeps_latest_artifacts(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=10)
+    source = store.put(b"ssss", kind="source")
+    other = store.put(b"oooo")
+    age(store, source, 1)
+    age(store, other, 2)
+    screenshot = store.put(b"pppp", kind="screenshot")
+    assert store.read(store.latest("source")) == b"ssss"
+    assert store.read(store.latest("screenshot")) == b"pppp"
+    assert store.read(other) is None
+    assert store.read(screenshot) == b"pppp"
+
+
+def test_size_bound_is_shared_between_instances(tmp_path):
+    stores = [ArtifactStore(str(tmp_path), max_bytes=100) for _ in range(4)]
+    for i in range(40):
+        stores[i % 4].put(b"%09d" % i)
+    total = 0
+    for root, _, files in os.walk(os.path.join(str(tmp_path), "objects")):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    assert total <= 100
+
+
+def fake_response(method, url, json=None):
+    if url.endswith("/screenshot"):
+        value = base64.b64encode(PNG).decode("ascii")
+    elif url.endswith("/source"):
+        value = SOURCE
+    else:
+        value = None
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {"sessionId": "sid", "value": value}
+    return response
+
+
+@pytest.fixture
+def requests_mock():
+    with mock.patch.object(driver.requests, "request", side_effect=fake_response):
+        yield
+
+
+def test_driver_without_store(requests_mock, tmp_path):
+    client = driver.CommonClient(base_url="http://wda")
+    assert client.get_page_source() == SOURCE
+    client.screenshot(str(tmp_path / "shot.png"))
+    assert (tmp_path / "shot.png").read_bytes() == PNG
+
+
+def test_driver_writes_through_store(requests_mock, tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"))
+    client = driver.CommonClient(base_url="http://wda", store=store)
+    assert client.get_page_source() == SOURCE
+    client.screenshot(raw=True)
+    reader = ArtifactStore(str(tmp_path / "store"))
+    assert reader.read(reader.latest("source")).decode("utf-8") == SOURCE
+    assert reader.read(reader.latest("screenshot")) == PNG
+
+
+def test_driver_store_errors_do_not_fail(requests_mock, tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    client = driver.CommonClient(base_url="http://wda", store=store)
+    with mock.patch.object(store, "put", side_effect=OSError("disk full")):
+        assert client.get_page_source() == SOURCE